@@ -15,6 +15,8 @@ PARTICULAR PURPOSE.  See the GNU General Public License for more details.
 Version: 3.1.0                                          Date: 14 March 2024
 
 Revision History
+    unreleased            v3.1.1
+        -   added optional png_compress_level plot option
     14 March 2024         v3.1.0
         -   version number change only
     6 July 2023           v3.0.2
@@ -66,6 +68,7 @@ Previous Bitbucket revision history
 """
 
 # python imports
+import bisect
 import datetime
 import math
 import os.path
@@ -105,6 +108,9 @@ try:
     def loginf(msg):
         log.info(msg)
 
+    def logerr(msg):
+        log.error(msg)
+
 except ImportError:
     # WeeWX legacy (v3) logging via syslog
     import syslog
@@ -115,9 +121,28 @@ except ImportError:
     def loginf(msg):
         logmsg(syslog.LOG_INFO, msg)
 
+    def logerr(msg):
+        logmsg(syslog.LOG_ERR, msg)
+
 STACKED_WINDROSE_VERSION = '3.1.0'
-DEFAULT_PETAL_COLORS = ['lightblue', 'blue', 'midnightblue', 'forestgreen',
-                        'limegreen', 'green', 'greenyellow']
+# default petal colors, resolved to RGB tuples once at import so they need not
+# be parsed each time a generator is initialised
+DEFAULT_PETAL_COLORS = tuple(ImageColor.getrgb(_c) for _c in ('lightblue',
+                                                              'blue',
+                                                              'midnightblue',
+                                                              'forestgreen',
+                                                              'limegreen',
+                                                              'green',
+                                                              'greenyellow'))
+# reciprocal of the 22.5 degree width of each of the 16 compass sectors
+INV_SECTOR_WIDTH = 1.0 / 22.5
+# petal, bulb and legend bar outline color as an RGB tuple, saves PIL parsing
+# a color name on every draw call
+OUTLINE_COLOR = ImageColor.getrgb('black')
+# cache of parsed color values used by parse_color()
+_color_cache = {}
+# horizontal time stamp placements
+TS_LEFT, TS_CENTER, TS_RIGHT = range(3)
 
 
 # ==============================================================================
@@ -150,6 +175,9 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
 
         self.image_dict = skin_dict['StackedWindRoseImageGenerator']
         self.title_dict = skin_dict['Labels']['Generic']
+        # legend titles for each of the observations we can plot
+        self.legend_titles = {'windSpeed': 'Wind Speed',
+                              'windGust': 'Gust Speed'}
         self.converter = weewx.units.Converter.fromSkinDict(skin_dict)
         self.formatter = weewx.units.Formatter.fromSkinDict(skin_dict)
         self.unit_helper = weewx.units.UnitInfoHelper(self.formatter,
@@ -162,6 +190,8 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
         self.image_background_circle_color = int(self.image_dict['image_background_circle_color'], 0)
         self.image_background_range_ring_color = int(self.image_dict['image_background_range_ring_color'], 0)
         self.image_background_image = self.image_dict['image_background_image']
+        # the background image object, created when first needed
+        self.background_image = None
 
         # set wind rose attributes
         self.windrose_plot_border = int(self.image_dict['windrose_plot_border'])
@@ -173,16 +203,40 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
         self.windrose_legend_font_color = int(self.image_dict['windrose_legend_font_color'], 0)
         self.windrose_label_font_size = int(self.image_dict['windrose_label_font_size'])
         self.windrose_label_font_color = int(self.image_dict['windrose_label_font_color'], 0)
+        # The font path and sizes do not change between plots so obtain the
+        # font handles once. get_font_handle() will return a default font if
+        # the requested font cannot be loaded.
+        self.plot_font = get_font_handle(self.windrose_font_path,
+                                         self.windrose_plot_font_size)
+        self.legend_font = get_font_handle(self.windrose_font_path,
+                                           self.windrose_legend_font_size)
+        self.label_font = get_font_handle(self.windrose_font_path,
+                                          self.windrose_label_font_size)
+        # Text is measured using a scratch draw object so that measurements
+        # do not depend on the plot being drawn, and the results are cached
+        # as the same strings are measured for every plot.
+        self.measure_draw = UniDraw(Image.new("RGB", (1, 1)))
+        self.text_size_cache = {}
+        # cache of formatted plot time stamps keyed by timestamp and format
+        self.time_stamp_cache = {}
+        # The size of the fixed strings used to lay out each plot depend only
+        # on the fonts, so measure them once now.
+        # text used to estimate the space required for the legend and label
+        self.legend_probe_size = self.text_size("0 (100%)", self.legend_font)
+        self.label_probe_size = self.text_size("Wind Rose", self.label_font)
+        # the compass point labels
+        self.compass_text_sizes = dict((_point, self.text_size(_point,
+                                                               self.plot_font))
+                                       for _point in ('N', 'S', 'E', 'W'))
         # set the petal colours
         # first get any petal colours specified in the config, if not defined
         # then use some sensible defaults
-        _colors = weeutil.weeutil.option_as_list(self.image_dict.get('windrose_plot_petal_colors',
-                                                                     DEFAULT_PETAL_COLORS))
+        _colors = weeutil.weeutil.option_as_list(self.image_dict.get('windrose_plot_petal_colors'))
         # verify our colors are valid
         _petal_colors = []
         # iterate over the colors we have and if they are valid keep them
         # otherwise discard them
-        for _color in _colors:
+        for _color in _colors or ():
             # parse the color, we will get bck a tuple representing the RGB
             # values or None if the color is invalid
             _col = parse_color(_color)
@@ -194,42 +248,65 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
         if len(_petal_colors) < 7:
             # if we don't have 7 augment the colors list with unused colors
             # from the defaults until we have 7
-            _required = 7 - len(_petal_colors)
             for _color in DEFAULT_PETAL_COLORS:
-                if _required > 0:
-                    _parsed = parse_color(_color)
-                    if _parsed not in _petal_colors:
-                        _petal_colors.append(_parsed)
-                        _required -= 1
-        # save the final ist of petal colors
-        self.petal_colors = list(_petal_colors)
+                if len(_petal_colors) >= 7:
+                    break
+                if _color not in _petal_colors:
+                    _petal_colors.append(_color)
+        # save the final list of petal colors, these are all RGB tuples so PIL
+        # need not resolve them when drawing
+        self.petal_colors = tuple(_petal_colors)
         # get petal width, if not defined then set default to 16 (degrees)
         try:
             self.windrose_plot_petal_width = int(self.image_dict['windrose_plot_petal_width'])
         except KeyError:
             self.windrose_plot_petal_width = 16
+        # The start and end angles of each of the 16 petals and the unit
+        # vectors along the four diagonal arms (NE, SE, SW and NW) that may
+        # carry the ring labels are fixed for the life of the generator, so
+        # calculate them once now rather than for every plot.
+        self.petal_angles = tuple((int(-90 + a * 22.5 - self.windrose_plot_petal_width / 2),
+                                   int(-90 + a * 22.5 + self.windrose_plot_petal_width / 2))
+                                  for a in range(16))
+        self.label_arm_vectors = tuple((math.cos(7 * math.pi / 4 + q * math.pi / 2),
+                                        math.sin(7 * math.pi / 4 + q * math.pi / 2))
+                                       for q in range(4))
         # Boundaries for speed range bands, these mark the colour boundaries
         # on the stacked bar in the legend. 7 elements only (ie 0, 10% of max,
         # 20% of max ... 100% of max)
         self.speed_factor = [0.0, 0.1, 0.2, 0.3, 0.5, 0.7, 1.0]
+        # the speed units and the unit label for display on the legend are
+        # common to all plots so look them up once
+        self.units = self.skin_dict['Units']['Groups']['group_speed']
+        self.unit_label = self.skin_dict['Units']['Labels'][self.units]
+        # the units label as displayed on the legend
+        self.unit_label_text = '(%s)' % self.unit_label.strip()
 
         # initialise some properties for later use
         self.plotgen_ts = None
         self.label = None
         self.time_stamp = None
         self.time_stamp_location = None
-        self.units = None
-        self.unit_label = None
         self.obs = None
         self.dir_name = None
+        # cache of speed and direction data obtained from the archive for the
+        # current plot period, keyed by plot period and observation names
+        self.wind_data_cache = {}
         self.max_ring_value = None
         self.label_dir = None
-        self.plot_font = None
-        self.legend_font = None
-        self.label_font = None
         self.rose_max_dia = None
         self.origin_x = None
         self.origin_y = None
+        self.legend_x = None
+        self.legend_y = None
+        # cache of plot layouts keyed by whether the plot has a label
+        self.layout_cache = {}
+        # cache of legend stacked bar segment y coords keyed by plot layout
+        self.bar_top_cache = {}
+        # cache of background images with the parts of the plot that do not
+        # depend on the plot data already drawn, keyed by obs type and plot
+        # layout
+        self.base_image_cache = {}
         self.draw = None
 
     def run(self):
@@ -251,21 +328,25 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
         t1 = time.time()
         # set plot count to 0
         ngen = 0
+        # get a db manager for the database archive, the binding is the same
+        # for every plot
+        db_manager = self.db_binder.get_manager(self.data_binding)
         # iterate over each time span class (day, week, month, etc)
         for timespan in self.image_dict.sections:
             # iterate over all plot names in this time span class
             for plotname in self.image_dict[timespan].sections:
                 # accumulate all options from parent nodes
                 plot_options = weeutil.weeutil.accumulateLeaves(self.image_dict[timespan][plotname])
-                # get a db manager for the database archive
-                db_manager = self.db_binder.get_manager(self.data_binding)
                 # Get end time for plot. In order try gen_ts, last known good
                 # archive time stamp and then current time.
                 self.plotgen_ts = gen_ts
                 if not self.plotgen_ts:
                     self.plotgen_ts = db_manager.lastGoodStamp()
                     if not self.plotgen_ts:
-                        self.plotgen_ts = time.time()
+                        # keep to integer epoch seconds like archive
+                        # timestamps, the plot span arithmetic then stays
+                        # integer throughout
+                        self.plotgen_ts = int(time.time())
                 # get the path of the image file we will save
                 image_root = os.path.join(self.config_dict['WEEWX_ROOT'],
                                           plot_options['HTML_ROOT'])
@@ -275,6 +356,18 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
                     image_format = plot_options['format']
                 else:
                     image_format = "png"
+                # Get PNG compression level, 0 (none) to 9 (most). Lower levels
+                # are faster to encode but produce larger files. If not set, or
+                # set to an invalid value, PIL uses its default (6).
+                try:
+                    _compress_level = weeutil.weeutil.to_int(plot_options.get('png_compress_level'))
+                    if _compress_level is not None and not 0 <= _compress_level <= 9:
+                        raise ValueError
+                except (TypeError, ValueError):
+                    if self.log_failure:
+                        logerr("Ignoring invalid png_compress_level '%s' for plot '%s'" % (plot_options.get('png_compress_level'),
+                                                                                           plotname))
+                    _compress_level = None
                 # get full file name and path for plot
                 img_file = os.path.join(image_root, '%s.%s' % (plotname,
                                                                image_format))
@@ -301,6 +394,8 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
                     else:
                         # otherwise raise the error
                         raise
+                # the image we draw on, there is none until a line is drawn
+                image = None
                 # iterate over each 'line' to be added to the plot.
                 for line_name in self.image_dict[timespan][plotname].sections:
                     # accumulate options from parent nodes.
@@ -312,16 +407,9 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
                     self.label = line_options.get('label')
                     # has a time_stamp has been explicitly requested.
                     self.time_stamp = line_options.get('time_stamp')
-                    # see if time_stamp location has been explicitly set
-                    _location = line_options.get('time_stamp_location')
-                    if _location:
-                        self.time_stamp_location = [x.upper() for x in _location]
-                    else:
-                        self.time_stamp_location = None
-                    # get units to be used
-                    self.units = self.skin_dict['Units']['Groups']['group_speed']
-                    # get unit label for display on legend
-                    self.unit_label = self.skin_dict['Units']['Labels'][self.units]
+                    # see if time_stamp location has been explicitly set,
+                    # parse it once into a (top, horizontal) tuple
+                    self.time_stamp_location = parse_time_stamp_location(line_options.get('time_stamp_location'))
                     # See what SQL variable type to use for this plot and get
                     # corresponding 'direction' type. Can really only plot
                     # windSpeed and windGust, if it's anything else default to
@@ -338,203 +426,87 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
                     # TODO. Review, may need to be time_length + 1
                     _span = weeutil.weeutil.TimeSpan(self.plotgen_ts - time_length,
                                                      self.plotgen_ts)
-                    (_t_vec, _t_vec_stop, _sp_vec) = db_manager.getSqlVectors(_span,
-                                                                              self.obs)
-                    (_t_vec, _t_vec_d_stop, dir_data) = db_manager.getSqlVectors(_span,
-                                                                                 self.dir_name)
-                    # convert the speeds to units to be used in the plot
-                    speed_data = weewx.units.convert(_sp_vec, self.units)
-                    # find maximum speed from our data
-                    _max_speed = weeutil.weeutil.max_with_none(speed_data.value)
+                    speeds, dirs = self.get_wind_data(db_manager, _span)
+                    # how many obs do we have?
+                    samples = len(speeds)
+                    # if there are no obs in the plot period there is nothing
+                    # to plot
+                    if samples == 0:
+                        continue
+                    # find maximum speed from our data, if every speed is
+                    # None use 0. Filtering out the None values and using the
+                    # builtin max() is much quicker than max_with_none() on
+                    # long periods.
+                    _max_speed = max([s for s in speeds if s is not None] or [0])
                     # set upper speed range for our plot, set to a multiple of
                     # 10 for a neater display
                     _max_speed_range = (int(_max_speed / 10.0) + 1) * 10
                     # setup 2D list with speed range boundaries in
                     # speed_list[0] petal colours in speed_list[1]
-                    speed_list = [[0 for x in range(7)] for x in range(2)]
+                    speed_list = [[0] * 7, None]
                     # store petal colours
                     speed_list[1] = self.petal_colors
                     # iterate over each speed range boundary and store in
                     # speed_list[0]
-                    i = 1
-                    while i < 7:
+                    for i in range(1, 7):
                         speed_list[0][i] = self.speed_factor[i] * _max_speed_range
-                        i += 1
-                    # Setup 2D list for wind direction. wind_bin[0] represents
-                    # each of 16 compass directions ([0] is N, [1] is ENE etc).
-                    # wind_bin[1] holds count of obs in a particular speed
-                    # range for given direction
-                    wind_bin = [[0 for x in range(7)] for x in range(17)]
-                    # setup list to hold obs counts for each speed range
-                    speed_bin = [0 for x in range(7)]
-                    # how many obs do we have?
-                    samples = len(_t_vec_stop[0])
-                    # Iterate over the samples and increment direction counts
-                    # and speed ranges for each direction as necessary. 'None'
-                    # direction is counted as 'calm' (or 0 speed) and
-                    # (by definition) no direction and are plotted in the
-                    # 'bulls eye' on the plot.
-                    i = 0
-                    while i < samples:
-                        if (speed_data.value[i] is None) or (dir_data.value[i] is None):
-                            wind_bin[16][6] += 1
-                        else:
-                            _bin = int((dir_data.value[i] + 11.25) / 22.5) % 16
-                            if speed_data.value[i] > speed_list[0][5]:
-                                wind_bin[_bin][6] += 1
-                            elif speed_data.value[i] > speed_list[0][4]:
-                                wind_bin[_bin][5] += 1
-                            elif speed_data.value[i] > speed_list[0][3]:
-                                wind_bin[_bin][4] += 1
-                            elif speed_data.value[i] > speed_list[0][2]:
-                                wind_bin[_bin][3] += 1
-                            elif speed_data.value[i] > speed_list[0][1]:
-                                wind_bin[_bin][2] += 1
-                            elif speed_data.value[i] > 0:
-                                wind_bin[_bin][1] += 1
-                            else:
-                                wind_bin[_bin][0] += 1
-                        i += 1
+                    # Bin the samples by direction and speed range. 'None'
+                    # obs are counted as 'calm' (or 0 speed) and (by
+                    # definition) no direction and are plotted in the 'bulls
+                    # eye' on the plot.
+                    wind_bin, none_count = bin_wind(speeds, dirs,
+                                                    speed_list[0][:6])
+                    # Set total (direction independent) speed counts, these
+                    # are the column totals of wind_bin
+                    speed_bin = [sum(col) for col in zip(*wind_bin)]
                     # add 'None' obs to 0 speed count
-                    speed_bin[0] += wind_bin[16][6]
-                    # don't need the 'None' counts so we can delete them
-                    del wind_bin[-1]
-                    # Set total (direction independent) speed counts. Iterate
-                    # over each petal speed range and increment direction
-                    # independent speed ranges as necessary.
-                    j = 0
-                    while j < 7:
-                        i = 0
-                        while i < 16:
-                            speed_bin[j] += wind_bin[i][j]
-                            i += 1
-                        j += 1
+                    speed_bin[0] += none_count
+                    # total obs for each direction (petal), these are used
+                    # repeatedly so calculate them once
+                    arm_totals = [sum(b) for b in wind_bin]
                     # Calculate the value to represented by outer ring
                     # (range 0 to 1). Round up to next multiple of 0.05
                     # (ie next 5%)
-                    self.max_ring_value = (int(max(sum(b) for b in wind_bin)/(0.05 * samples)) + 1) * 0.05
+                    self.max_ring_value = (int(max(arm_totals)/(0.05 * samples)) + 1) * 0.05
                     # Find which wind rose arm to use to display ring range
                     # labels - look for one that is relatively clear. Only
                     # consider NE, SE, SW and NW. Preference in order is SE,
-                    # SW, NE and NW
-                    # is SE clear?
-                    if sum(wind_bin[6])/float(samples) <= 0.3 * self.max_ring_value:
-                        # it is so take it
-                        label_dir = 6
+                    # SW, NE and NW. If none are clear take the arm with the
+                    # fewest obs, preferring NE, SE, SW and NW in that order.
+                    _clear = 0.3 * self.max_ring_value
+                    for label_dir in (6, 10, 2, 14):
+                        if arm_totals[label_dir]/float(samples) <= _clear:
+                            break
                     else:
-                        # it's not so check the others
-                        for i in [10, 2, 14]:
-                            if sum(wind_bin[i])/float(samples) <= 0.3*self.max_ring_value:
-                                # got one so take it and break
-                                label_dir = i
-                                break
-                        else:
-                            # none are free so take the smallest of the four
-                            # set count to max possible number of readings + 1
-                            label_count = samples + 1
-                            # iterate over the directions
-                            for i in [2, 6, 10, 14]:
-                                # does this direction have fewer obs than
-                                # previous best (least)
-                                if sum(wind_bin[i]) < label_count:
-                                    # it does so set min count to this bin
-                                    label_count = sum(wind_bin[i])
-                                    # set label_dir to this direction
-                                    label_dir = i
+                        label_dir = min((2, 6, 10, 14),
+                                        key=arm_totals.__getitem__)
                     # now set the label direction we are going to use
                     self.label_dir = label_dir
+                    # set the plot layout, this depends only on the image
+                    # config and whether the plot has a label
+                    (self.rose_max_dia, self.origin_x, self.origin_y,
+                     self.legend_x, self.legend_y) = self.plot_layout(bool(self.label))
                     # get an image object to hold our plot
                     image = self.windrose_image_setup()
                     self.draw = UniDraw(image)
-                    # set fonts to be used
-                    self.plot_font = get_font_handle(self.windrose_font_path,
-                                                     self.windrose_plot_font_size)
-                    self.legend_font = get_font_handle(self.windrose_font_path,
-                                                       self.windrose_legend_font_size)
-                    self.label_font = get_font_handle(self.windrose_font_path,
-                                                      self.windrose_label_font_size)
-                    # estimate space required for the legend
-                    text_w, text_h = self.draw.textsize("0 (100%)",
-                                                        font=self.legend_font)
-                    legend_w = int(text_w + 2 * self.windrose_legend_bar_width + 1.5 * self.windrose_plot_border)
-                    # estimate space required for label (if required)
-                    text_w, text_h = self.draw.textsize("Wind Rose",
-                                                        font=self.label_font)
-                    if self.label:
-                        label_h = int(text_w + self.windrose_plot_border)
-                    else:
-                        label_h = 0
-                    # Calculate the diameter of the circular plot space in
-                    # pixels. Two diameters are calculated, one based on image
-                    # height and one based on image width, and the smallest one
-                    # used. To prevent optical distortion for small plots
-                    # diameter will be divisible by 22.
-                    self.rose_max_dia = min(int((self.image_height - 2 * self.windrose_plot_border - label_h / 2) / 22.0) * 22,
-                                            int((self.image_width - (2 * self.windrose_plot_border + legend_w)) / 22.0) * 22)
-                    if self.image_width > self.image_height:
-                        # plot is wider than it is high
-                        text_w, text_h = self.draw.textsize("W",
-                                                            font=self.plot_font)
-                        # x coord of windrose circle origin(0,0) is top left
-                        # corner
-                        self.origin_x = self.windrose_plot_border + text_w + 2 + self.rose_max_dia / 2
-                        # y coord of windrose circle origin(0,0) is top left
-                        # corner
-                        self.origin_y = int(self.image_height / 2)
-                    else:
-                        # plot is higher than it is wide
-                        # x coord of windrose circle origin(0,0) is top left
-                        # corner
-                        self.origin_x = 2 * self.windrose_plot_border + self.rose_max_dia / 2
-                        # y coord of windrose circle origin(0,0) is top left
-                        # corner
-                        self.origin_y = 2 * self.windrose_plot_border + self.rose_max_dia / 2
-                    # Setup windrose plot. Plot circles, range rings, range
-                    # labels, N-S and E-W centre lines and compass point labels
+                    # Setup windrose plot. The circles, range rings, N-S and
+                    # E-W centre lines and compass point labels are already on
+                    # the image so only the range labels need be drawn
                     self.wind_rose_plot_setup()
-                    # Plot the wind rose petals. Each petal is constructed from
-                    # overlapping pie slices starting from outside (biggest)
-                    # and working in (smallest).
-                    # start with the 'North' petal
-                    a = 0
-                    # iterate over each wind rose arm
-                    while a < len(wind_bin):
-                        s = len(speed_list[0]) - 1
-                        cum_rad = sum(wind_bin[a])
-                        if cum_rad > 0:
-                            arm_rad = int((10 * self.rose_max_dia * sum(wind_bin[a])) /
-                                          (11 * 2.0 * self.max_ring_value * samples))
-                            while s > 0:
-                                # calc radius of current arm
-                                pie_rad = int(round(arm_rad * cum_rad/sum(wind_bin[a]) + self.rose_max_dia/22, 0))
-                                # set bound box for pie slice
-                                xy = (self.origin_x-pie_rad,
-                                      self.origin_y-pie_rad,
-                                      self.origin_x+pie_rad,
-                                      self.origin_y+pie_rad)
-                                # draw pie slice
-                                start = int(-90 + a * 22.5 - self.windrose_plot_petal_width / 2)
-                                end = int(-90 + a * 22.5 + self.windrose_plot_petal_width / 2)
-                                self.draw.pieslice(xy, start, end,
-                                                   fill=speed_list[1][s],
-                                                   outline='black')
-                                cum_rad -= wind_bin[a][s]
-                                # move 'in' for next pie slice
-                                s -= 1
-                        # next arm
-                        a += 1
+                    # Plot the wind rose petals.
+                    self.draw_petals(wind_bin, arm_totals, speed_list[1], samples)
                     # draw 'bulls eye' to represent speed=0 or calm
                     # first produce the label
-                    label0 = "%d%%" % int(round(100.0 * speed_bin[0]/sum(speed_bin), 0))
+                    label0 = "%d%%" % percent(speed_bin[0], samples)
                     # work out its size, particularly its width
-                    text_w, text_h = self.draw.textsize(label0, font=self.plot_font)
+                    text_w, text_h = self.text_size(label0, self.plot_font)
                     # size the bound box
                     xy = (int(self.origin_x-self.rose_max_dia/22),
                           int(self.origin_y-self.rose_max_dia/22),
                           int(self.origin_x+self.rose_max_dia/22),
                           int(self.origin_y+self.rose_max_dia/22))
                     # draw the circle
-                    self.draw.ellipse(xy, outline='black', fill=speed_list[1][0])
+                    self.draw.ellipse(xy, outline=OUTLINE_COLOR, fill=speed_list[1][0])
                     # size the text
                     xy = (int(self.origin_x - text_w / 2),
                           int(self.origin_y - text_h / 2))
@@ -544,9 +516,16 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
                                    font=self.plot_font)
                     # Set up the legend. Draw label/title (if set), stacked
                     # bar, bar labels and units
-                    self.legend_setup(speed_list, speed_bin)
-                # save the file.
-                image.save(img_file)
+                    self.legend_setup(speed_list, speed_bin, samples)
+                # if no lines were drawn there is nothing to save
+                if image is None:
+                    continue
+                # save the file, if saving a PNG use any compression level
+                # that has been set
+                if _compress_level is not None and image_format.lower() == 'png':
+                    image.save(img_file, compress_level=_compress_level)
+                else:
+                    image.save(img_file)
                 # increment number of images generated
                 ngen += 1
         if self.log_success:
@@ -555,207 +534,437 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
                                                                    self.skin_dict['REPORT_NAME'],
                                                                    t2 - t1))
 
+    def get_wind_data(self, db_manager, span):
+        """Obtain the speed and direction data for a plot period.
+
+        Plots and lines that cover the same period and use the same
+        observations use the same data, so the data is cached and the
+        archive only queried the first time a given period and observation
+        pair is requested. Only data for the period being plotted is kept,
+        data for any other period is released when a new period is
+        requested.
+
+        db_manager: manager for the database archive
+
+        span:       TimeSpan object for the plot period
+
+        Returns a two-way tuple of lists containing the speed data, in the
+        plot speed units, and the direction data. Missing values are None.
+        """
+
+        _key = (span.start, span.stop, self.obs, self.dir_name)
+        if _key not in self.wind_data_cache:
+            # Cached data is only reused by plots covering the same period
+            # and the plots for a period are generated together, so release
+            # any data held for other periods before querying the archive.
+            for _cached_key in [k for k in self.wind_data_cache if k[:2] != _key[:2]]:
+                del self.wind_data_cache[_cached_key]
+            # Obtain the speed and direction data in a single pass over the
+            # archive rather than a getSqlVectors() call for each. As with
+            # getSqlVectors() the data must all be in the same unit system.
+            _sql = "SELECT usUnits, %s, %s FROM %s " \
+                   "WHERE dateTime > ? AND dateTime <= ?" % (self.obs,
+                                                             self.dir_name,
+                                                             db_manager.table_name)
+            std_unit_system = None
+            _speeds = []
+            _dirs = []
+            for _row in db_manager.genSql(_sql, (span.start, span.stop)):
+                if std_unit_system is None:
+                    std_unit_system = _row[0]
+                elif _row[0] != std_unit_system:
+                    raise weewx.UnsupportedFeature("Unit type cannot change "
+                                                   "within a time interval.")
+                _speeds.append(_row[1])
+                _dirs.append(_row[2])
+            if std_unit_system is not None:
+                # convert the speeds to units to be used in the plot, we only
+                # need the plain speed value list from here on
+                _unit, _group = weewx.units.getStandardUnitType(std_unit_system,
+                                                                self.obs)
+                _speeds = weewx.units.convert(weewx.units.ValueTuple(_speeds,
+                                                                     _unit,
+                                                                     _group),
+                                              self.units).value
+            self.wind_data_cache[_key] = (_speeds, _dirs)
+        return self.wind_data_cache[_key]
+
+    def plot_layout(self, has_label):
+        """Calculate the layout of a plot.
+
+        The layout depends only on the image config, the fonts and whether
+        the plot has a label, so each of the two possible layouts is
+        calculated once and cached.
+
+        has_label: whether the plot has a label/title
+
+        Returns a tuple consisting of the diameter of the circular plot space,
+        the x and y coordinates of the wind rose origin and the x and y
+        coordinates of the bottom left of the legend stacked bar.
+        """
+
+        try:
+            return self.layout_cache[has_label]
+        except KeyError:
+            pass
+        # estimate space required for the legend
+        text_w, text_h = self.legend_probe_size
+        legend_w = int(text_w + 2 * self.windrose_legend_bar_width + 1.5 * self.windrose_plot_border)
+        # estimate space required for label (if required)
+        text_w, text_h = self.label_probe_size
+        if has_label:
+            label_h = int(text_w + self.windrose_plot_border)
+        else:
+            label_h = 0
+        # Calculate the diameter of the circular plot space in pixels. Two
+        # diameters are calculated, one based on image height and one based
+        # on image width, and the smallest one used. To prevent optical
+        # distortion for small plots diameter will be divisible by 22.
+        rose_max_dia = min(int((self.image_height - 2 * self.windrose_plot_border - label_h / 2) / 22.0) * 22,
+                           int((self.image_width - (2 * self.windrose_plot_border + legend_w)) / 22.0) * 22)
+        if self.image_width > self.image_height:
+            # plot is wider than it is high
+            text_w, text_h = self.compass_text_sizes['W']
+            # x coord of windrose circle origin(0,0) is top left corner
+            origin_x = self.windrose_plot_border + text_w + 2 + rose_max_dia / 2
+            # y coord of windrose circle origin(0,0) is top left corner
+            origin_y = int(self.image_height / 2)
+        else:
+            # plot is higher than it is wide
+            # x coord of windrose circle origin(0,0) is top left corner
+            origin_x = 2 * self.windrose_plot_border + rose_max_dia / 2
+            # y coord of windrose circle origin(0,0) is top left corner
+            origin_y = 2 * self.windrose_plot_border + rose_max_dia / 2
+        # legend_x and legend_y = x,y coords of bottom left of the legend
+        # stacked bar, everything in the legend is relative to this point
+        text_w, text_h = self.compass_text_sizes['E']
+        legend_x = origin_x + rose_max_dia / 2 + text_w + 10
+        legend_y = origin_y + rose_max_dia / 2 - rose_max_dia / 22
+        self.layout_cache[has_label] = (rose_max_dia, origin_x, origin_y,
+                                        legend_x, legend_y)
+        return self.layout_cache[has_label]
+
+    def text_size(self, text, font):
+        """Obtain the width and height of a string rendered in a given font.
+
+        Text is measured using the font's getbbox() method (PIL 8.0 and
+        later), this avoids the ImageDraw layer and the deprecated (and in PIL
+        10.0 removed) ImageDraw.textsize() method. If the font has no
+        getbbox() method, or the font cannot render the text, we fall back to
+        UniDraw.textsize(). Results are cached by text and font.
+        """
+
+        _key = (text, font)
+        try:
+            return self.text_size_cache[_key]
+        except KeyError:
+            try:
+                left, top, right, bottom = font.getbbox(text)
+                _size = (right - left, bottom - top)
+            except (AttributeError, UnicodeEncodeError):
+                _size = self.measure_draw.textsize(text, font=font)
+            self.text_size_cache[_key] = _size
+            return _size
+
     def windrose_image_setup(self):
         """Create image object for us to draw on.
 
         image: Image object to be returned for us to draw on.
         """
 
-        try:
-            image = Image.open(self.image_background_image)
-        except IOError:
-            image = Image.new("RGB",
-                              (self.image_width, self.image_height),
-                              self.image_background_box_color)
-        return image
-
-    def wind_rose_plot_setup(self):
-        """Draw circular plot background, rings, axes and labels."""
+        # The background is the same for every plot so it is only opened (or
+        # created) the first time it is needed. The range rings, centre
+        # lines, compass point labels, legend stacked bar, 'calm' bulb, title
+        # and units label only change with the obs type and plot layout so
+        # they are drawn once onto a copy of the background, each plot is
+        # then drawn on a copy of that.
+        _key = (self.obs, self.rose_max_dia, self.origin_x, self.origin_y,
+                self.legend_x, self.legend_y)
+        _base = self.base_image_cache.get(_key)
+        if _base is not None:
+            return _base.copy()
+        if self.background_image is None:
+            try:
+                self.background_image = Image.open(self.image_background_image)
+                # force the image to be decoded now rather than on every copy
+                self.background_image.load()
+            except IOError:
+                self.background_image = Image.new("RGB",
+                                                  (self.image_width, self.image_height),
+                                                  self.image_background_box_color)
+        _base = self.background_image.copy()
+        _draw = UniDraw(_base)
+        self.rose_background_setup(_draw)
+        self.legend_base_setup(_draw)
+        self.base_image_cache[_key] = _base
+        return _base.copy()
+
+    def rose_background_setup(self, draw):
+        """Draw circular plot background, rings, axes and compass labels.
+
+        These depend only on the plot layout so they are drawn once onto the
+        plot background rather than onto every plot.
+
+        draw: UniDraw object to draw on
+        """
 
-        # draw speed circles
-        # First calculate the distance between the wind rose range rings. Note that
-        # 'calm' bulls eye is at centre of plot with diameter equal to _min_radius.
+        # the 'calm' bulls eye is at the centre of the plot with diameter
+        # equal to _min_radius, each range ring is _min_radius further out
         _min_radius = self.rose_max_dia/11
-        # iterate over the range rings starting from the inside and working out
-        i = 5
-        while i > 0:
-            xy = (self.origin_x - _min_radius * (i + 0.5),
-                  self.origin_y - _min_radius * (i + 0.5),
-                  self.origin_x + _min_radius * (i + 0.5),
-                  self.origin_y + _min_radius * (i + 0.5))
-            # draw the ring
-            self.draw.ellipse(xy,
-                              outline=self.image_background_range_ring_color,
-                              fill=self.image_background_circle_color)
-            i -= 1
+        # draw the range rings from the outside in
+        for i in range(5, 0, -1):
+            _radius = _min_radius * (i + 0.5)
+            xy = (self.origin_x - _radius,
+                  self.origin_y - _radius,
+                  self.origin_x + _radius,
+                  self.origin_y + _radius)
+            draw.ellipse(xy,
+                         outline=self.image_background_range_ring_color,
+                         fill=self.image_background_circle_color)
 
         # draw vertical centre line
         xy = [(self.origin_x, self.origin_y - self.rose_max_dia / 2 - 2),
               (self.origin_x, self.origin_y + self.rose_max_dia / 2 + 2)]
-        self.draw.line(xy, fill=self.image_background_range_ring_color)
+        draw.line(xy, fill=self.image_background_range_ring_color)
         # draw horizontal centre line
         xy = [(self.origin_x - self.rose_max_dia / 2 - 2, self.origin_y),
               (self.origin_x + self.rose_max_dia / 2 + 2, self.origin_y)]
-        self.draw.line(xy, fill=self.image_background_range_ring_color)
+        draw.line(xy, fill=self.image_background_range_ring_color)
         # draw N,S,E,W markers
-        text_w, text_h = self.draw.textsize('N', font=self.plot_font)
+        text_w, text_h = self.compass_text_sizes['N']
         xy = (self.origin_x - text_w / 2,
               self.origin_y - self.rose_max_dia / 2 - 1 - text_h)
-        self.draw.text(xy, 'N', fill=self.windrose_plot_font_color, font=self.plot_font)
-        text_w, text_h = self.draw.textsize('S', font=self.plot_font)
+        draw.text(xy, 'N', fill=self.windrose_plot_font_color, font=self.plot_font)
+        text_w, text_h = self.compass_text_sizes['S']
         xy = (self.origin_x - text_w / 2,
               self.origin_y + self.rose_max_dia / 2 + 3)
-        self.draw.text(xy, 'S', fill=self.windrose_plot_font_color, font=self.plot_font)
-        text_w, text_h = self.draw.textsize('W', font=self.plot_font)
+        draw.text(xy, 'S', fill=self.windrose_plot_font_color, font=self.plot_font)
+        text_w, text_h = self.compass_text_sizes['W']
         xy = (self.origin_x - self.rose_max_dia / 2 - 1 - text_w,
               self.origin_y - text_h / 2)
-        self.draw.text(xy, 'W', fill=self.windrose_plot_font_color, font=self.plot_font)
-        text_w, text_h = self.draw.textsize('E', font=self.plot_font)
+        draw.text(xy, 'W', fill=self.windrose_plot_font_color, font=self.plot_font)
+        text_w, text_h = self.compass_text_sizes['E']
         xy = (self.origin_x + self.rose_max_dia / 2 + 1,
               self.origin_y - text_h / 2)
-        self.draw.text(xy, 'E', fill=self.windrose_plot_font_color, font=self.plot_font)
+        draw.text(xy, 'E', fill=self.windrose_plot_font_color, font=self.plot_font)
+
+    def legend_bar_tops(self):
+        """Obtain the y coords of the top of each legend stacked bar segment.
+
+        Returns a tuple of 7 y coords, one for each speed range, element 0
+        being the bottom of the stacked bar. The coords depend only on the
+        plot layout so are calculated once per layout and cached.
+        """
+
+        _key = (self.rose_max_dia, self.legend_y)
+        _tops = self.bar_top_cache.get(_key)
+        if _tops is None:
+            bar_h = 0.85 * self.rose_max_dia
+            _tops = tuple(self.legend_y - bar_h * factor for factor in self.speed_factor)
+            self.bar_top_cache[_key] = _tops
+        return _tops
+
+    def wind_rose_plot_setup(self):
+        """Draw the range ring labels."""
+
         # draw % labels on rings
         # calculate the value increment between rings
         _label_inc = self.max_ring_value/5
-        # initialise a list to hold ring labels
-        speed_labels = list((0, 0, 0, 0, 0))
-        i = 1
-        while i < 6:
-            speed_labels[i - 1] = "%d%%" % int(round(_label_inc * i * 100, 0))
-            i += 1
+        # ring labels, innermost first
+        speed_labels = ["%d%%" % int(round(_label_inc * i * 100, 0)) for i in range(1, 6)]
         # calculate location of ring labels
-        _angle = 7 * math.pi / 4 + int(self.label_dir / 4.0) * math.pi / 2
-        label_offset_x = int(round(self.rose_max_dia / 22 * math.cos(_angle), 0))
-        label_offset_y = int(round(self.rose_max_dia / 22 * math.sin(_angle), 0))
+        _cos, _sin = self.label_arm_vectors[int(self.label_dir / 4.0)]
+        label_offset_x = int(round(self.rose_max_dia / 22 * _cos, 0))
+        label_offset_y = int(round(self.rose_max_dia / 22 * _sin, 0))
         # Draw ring labels. Note leave inner ring blank due to lack of space. For
         # clarity each label (except for outside ring) is drawn on a rectangle with
         # background colour set to that of the circular plot.
-        i = 2
-        while i < 5:
-            text_w, text_h = self.draw.textsize(speed_labels[i - 1],
-                                                font=self.plot_font)
-            x0 = self.origin_x + (2 * i + 1) * label_offset_x - text_w / 2
-            y0 = self.origin_y + (2 * i + 1) * label_offset_y - text_h / 2
-            x1 = self.origin_x + (2 * i + 1) * label_offset_x + text_w / 2
-            y1 = self.origin_y + (2 * i + 1) * label_offset_y + text_h / 2
-            self.draw.rectangle([x0, y0, x1, y1],
-                                fill=self.image_background_circle_color)
-            xy = (self.origin_x + (2 * i + 1) * label_offset_x - text_w / 2,
-                  self.origin_y + (2 * i + 1) * label_offset_y - text_h / 2)
-            self.draw.text(xy,
-                           speed_labels[i-1],
+        for i in range(2, 6):
+            text_w, text_h = self.text_size(speed_labels[i - 1], self.plot_font)
+            # the label is centred on the arm
+            x_c = self.origin_x + (2 * i + 1) * label_offset_x
+            y_c = self.origin_y + (2 * i + 1) * label_offset_y
+            x0 = x_c - text_w / 2
+            y0 = y_c - text_h / 2
+            if i < 5:
+                self.draw.rectangle([x0, y0, x_c + text_w / 2, y_c + text_h / 2],
+                                    fill=self.image_background_circle_color)
+            self.draw.text((x0, y0),
+                           speed_labels[i - 1],
                            fill=self.windrose_plot_font_color, font=self.plot_font)
-            i += 1
-        # draw outside ring label
-        text_w, text_h = self.draw.textsize(speed_labels[i-1], font=self.plot_font)
-        xy = (self.origin_x + (2 * i + 1) * label_offset_x - text_w / 2,
-              self.origin_y + (2 * i + 1) * label_offset_y - text_h / 2)
-        self.draw.text(xy,
-                       speed_labels[i-1],
-                       fill=self.windrose_plot_font_color, font=self.plot_font)
-
-    def legend_setup(self, speed_list, speed_bin):
+
+    def draw_petals(self, wind_bin, arm_totals, petal_colors, samples):
+        """Draw the wind rose petals.
+
+        Each petal is constructed from overlapping pie slices starting from
+        outside (biggest) and working in (smallest). The petal geometry is
+        fixed (16 petals, 7 speed ranges) so the petal angles are looked up
+        from the table calculated in __init__. The geometry of all pie slices
+        is calculated first and the slices then drawn in a tight loop that
+        does no arithmetic.
+
+        wind_bin:     16 x 7 list of lists of obs counts by direction and
+                      speed range
+
+        arm_totals:   list of total obs counts for each direction
+
+        petal_colors: sequence of petal colors, one per speed range
+
+        samples:      total number of obs
+        """
+
+        petal_angles = self.petal_angles
+        origin_x = self.origin_x
+        origin_y = self.origin_y
+        # the radius of the 'calm' bulls eye, every pie slice starts from here
+        hub_rad = self.rose_max_dia/22
+        # the arm radius scale factor is the same for every arm
+        arm_scale = 11 * 2.0 * self.max_ring_value * samples
+        # First calculate the bounding box, angles and fill of every pie slice
+        # to be drawn. Start with the 'North' petal and iterate over each wind
+        # rose arm.
+        slices = []
+        for a in range(16):
+            # cum_rad is the count of obs in the current speed range and all
+            # lower speed ranges, it starts as the arm total and each speed
+            # range count is subtracted as we move in
+            arm_total = cum_rad = arm_totals[a]
+            if cum_rad > 0:
+                arm_bin = wind_bin[a]
+                arm_rad = int((10 * self.rose_max_dia * arm_total) / arm_scale)
+                start, end = petal_angles[a]
+                for s in range(6, 0, -1):
+                    # If there are no obs in this speed range the next pie
+                    # slice in has the same radius and will completely cover
+                    # this one, so only draw the pie slice if it will be seen.
+                    if arm_bin[s] > 0 or s == 1:
+                        # calc radius of current arm
+                        pie_rad = int(round(arm_rad * cum_rad/arm_total + hub_rad, 0))
+                        # save the bound box, angles and fill for the pie
+                        # slice
+                        slices.append(((origin_x-pie_rad,
+                                        origin_y-pie_rad,
+                                        origin_x+pie_rad,
+                                        origin_y+pie_rad),
+                                       start, end, petal_colors[s]))
+                    # move 'in' for next pie slice
+                    cum_rad -= arm_bin[s]
+        # now draw the pie slices, the order of the slices in the list
+        # ensures the inner slices of each petal are drawn over the outer
+        pieslice = self.draw.pieslice
+        for xy, start, end, fill in slices:
+            pieslice(xy, start, end, fill=fill, outline=OUTLINE_COLOR)
+
+    def legend_base_setup(self, draw):
+        """Draw the legend stacked bar, 'calm' bulb, title and units label.
+
+        The stacked bar and 'calm' bulb are drawn in the fixed petal colours
+        and, along with the title and units label, depend only on the obs
+        type and the plot layout. So they are drawn once onto the plot
+        background rather than onto every plot.
+
+        draw: UniDraw object to draw on
+        """
+
+        # label_x and label_y = x,y coords of bottom left of stacked bar
+        label_x = self.legend_x
+        label_y = self.legend_y
+        bar_w = self.windrose_legend_bar_width
+        bar_h = 0.85 * self.rose_max_dia
+        bulb_d = int(round(1.2 * bar_w, 0))
+        bar_tops = self.legend_bar_tops()
+        # draw stacked bar
+        for i in range(6, 0, -1):
+            draw.rectangle([label_x, bar_tops[i], label_x + bar_w, label_y],
+                           fill=self.petal_colors[i], outline=OUTLINE_COLOR)
+        # draw 'calm' label
+        text_w, text_h = self.text_size('Calm', self.legend_font)
+        xy = (label_x - text_w - 2,
+              bar_tops[0] - text_h / 2)
+        draw.text(xy, 'Calm',
+                  fill=self.windrose_legend_font_color, font=self.legend_font)
+        # draw 'calm' bulb on bottom of stacked bar
+        xy = (label_x - bulb_d / 2 + bar_w / 2,
+              label_y - bar_w / 6,
+              label_x + bulb_d / 2 + bar_w / 2,
+              label_y - bar_w / 6 + bulb_d)
+        draw.ellipse(xy, outline=OUTLINE_COLOR, fill=self.petal_colors[0])
+        # draw legend title
+        title_text = self.legend_titles[self.obs]
+        text_w, text_h = self.text_size(title_text, self.legend_font)
+        xy = (label_x + bar_w / 2 - text_w / 2,
+              label_y - 5 * text_h / 2 - bar_h)
+        draw.text(xy, title_text,
+                  fill=self.windrose_legend_font_color, font=self.legend_font)
+        # draw legend units label
+        text_w, text_h = self.text_size(self.unit_label_text, self.legend_font)
+        xy = (label_x + bar_w / 2 - text_w / 2,
+              label_y - 3 * text_h / 2 - bar_h)
+        draw.text(xy, self.unit_label_text,
+                  fill=self.windrose_legend_font_color, font=self.legend_font)
+
+    def legend_setup(self, speed_list, speed_bin, samples):
         """Draw plot title (if requested), legend and time stamp (if requested).
 
             speed_list: 2D list with speed range boundaries in speed_list[0] and
                         petal colours in speed_list[1]
 
             speed_bin: 1D list to hold overall obs count for each speed range
+
+            samples: total number of obs, this is the sum of speed_bin
         """
 
-        # set static values
-        text_w, text_h = self.draw.textsize('E', font=self.plot_font)
-        # label_x and label_y = x,y coords of bottom left of stacked bar.
-        # Everything else is relative to this point
-        label_x = self.origin_x+self.rose_max_dia/2 + text_w + 10
-        label_y = self.origin_y+self.rose_max_dia/2 - self.rose_max_dia/22
-        bulb_d = int(round(1.2 * self.windrose_legend_bar_width, 0))
-        # draw stacked bar and label with values/percentages
-        i = 6
-        while i > 0:
-            x0 = label_x
-            y0 = label_y - (0.85 * self.rose_max_dia * self.speed_factor[i])
-            x1 = label_x + self.windrose_legend_bar_width
-            y1 = label_y
-            self.draw.rectangle([x0, y0, x1, y1],
-                                fill=speed_list[1][i], outline='black')
-            text_w, text_h = self.draw.textsize(str(speed_list[0][i]),
-                                                font=self.legend_font)
-            xy = (label_x + 1.5 * self.windrose_legend_bar_width,
-                  label_y - text_h / 2 - (0.85 * self.rose_max_dia * self.speed_factor[i]))
+        # the stacked bar, 'calm' bulb, title and units label are already on
+        # the image so only the values/percentages need be drawn. The labels
+        # are placed relative to the stacked bar, the bottom left of which is
+        # at self.legend_x, self.legend_y.
+        bar_tops = self.legend_bar_tops()
+        text_x = self.legend_x + 1.5 * self.windrose_legend_bar_width
+        # label the stacked bar with values/percentages
+        for i in range(6, 0, -1):
+            y0 = bar_tops[i]
+            text_w, text_h = self.text_size(str(speed_list[0][i]), self.legend_font)
+            xy = (text_x, y0 - text_h / 2)
             _text = '%d (%d%%)' % (int(round(speed_list[0][i], 0)),
-                                   int(round(100 * speed_bin[i]/sum(speed_bin), 0)))
+                                   percent(speed_bin[i], samples))
             self.draw.text(xy, _text,
                            fill=self.windrose_legend_font_color, font=self.legend_font)
-            i -= 1
-        text_w, text_h = self.draw.textsize(str(speed_list[0][0]),
-                                            font=self.legend_font)
+        text_w, text_h = self.text_size(str(speed_list[0][0]), self.legend_font)
         # draw 'calm' or 0 speed label and %
-        xy = (label_x + 1.5 * self.windrose_legend_bar_width,
-              label_y - text_h / 2 - (0.85 * self.rose_max_dia * self.speed_factor[0]))
+        xy = (text_x, bar_tops[0] - text_h / 2)
         _text = '%d (%d%%)' % (speed_list[0][0],
-                               int(round(100.0 * speed_bin[0]/sum(speed_bin), 0)))
+                               percent(speed_bin[0], samples))
         self.draw.text(xy, _text,
                        fill=self.windrose_legend_font_color, font=self.legend_font)
-        text_w, text_h = self.draw.textsize('Calm', font=self.legend_font)
-        xy = (label_x - text_w - 2,
-              label_y - text_h / 2 - (0.85 * self.rose_max_dia * self.speed_factor[0]))
-        self.draw.text(xy, 'Calm',
-                       fill=self.windrose_legend_font_color, font=self.legend_font)
-        # draw 'calm' bulb on bottom of stacked bar
-        xy = (label_x - bulb_d / 2 + self.windrose_legend_bar_width / 2,
-              label_y - self.windrose_legend_bar_width / 6,
-              label_x + bulb_d / 2 + self.windrose_legend_bar_width / 2,
-              label_y - self.windrose_legend_bar_width / 6 + bulb_d)
-        self.draw.ellipse(xy, outline='black', fill=speed_list[1][0])
-        # draw legend title
-        if self.obs == 'windGust':
-            title_text = 'Gust Speed'
-        else:
-            title_text = 'Wind Speed'
-        text_w, text_h = self.draw.textsize(title_text, font=self.legend_font)
-        xy = (label_x + self.windrose_legend_bar_width / 2 - text_w / 2,
-              label_y - 5 * text_h / 2 - (0.85 * self.rose_max_dia))
-        self.draw.text(xy, title_text,
-                       fill=self.windrose_legend_font_color, font=self.legend_font)
-        # draw legend units label
-        text_w, text_h = self.draw.textsize('(%s)' % self.unit_label.strip(),
-                                            font=self.legend_font)
-        xy = (label_x + self.windrose_legend_bar_width / 2 - text_w / 2,
-              label_y - 3 * text_h / 2 - (0.85 * self.rose_max_dia))
-        self.draw.text(xy, '(%s)' % self.unit_label.strip(),
-                       fill=self.windrose_legend_font_color, font=self.legend_font)
-        # draw plot title (label) if any, make sure we convert any unicode that
-        # might sneak in
+        # draw plot title (label) if any, UniDraw.text() takes care of any
+        # unicode the font cannot handle
         if self.label:
-            text_w, text_h = self.draw.textsize(self.label, font=self.label_font)
-            try:
-                self.draw.text((self.origin_x - text_w/2, text_h/2),
-                               self.label,
-                               fill=self.windrose_label_font_color,
-                               font=self.label_font)
-            except UnicodeEncodeError:
-                self.draw.text((self.origin_x - text_w/2, text_h/2),
-                               self.label.encode("utf-8"),
-                               fill=self.windrose_label_font_color,
-                               font=self.label_font)
+            text_w, text_h = self.text_size(self.label, self.label_font)
+            self.draw.text((self.origin_x - text_w/2, text_h/2),
+                           self.label,
+                           fill=self.windrose_label_font_color,
+                           font=self.label_font)
         # draw plot timestamp if any
         if self.time_stamp:
-            ts_text = datetime.datetime.fromtimestamp(self.plotgen_ts).strftime(self.time_stamp).strip()
-            text_w, text_h = self.draw.textsize(ts_text, font=self.label_font)
-            if self.time_stamp_location is not None:
-                if 'TOP' in self.time_stamp_location:
-                    ts_y = self.windrose_plot_border + text_h
-                else:
-                    ts_y = self.image_height - self.windrose_plot_border - text_h
-                if 'LEFT' in self.time_stamp_location:
-                    ts_x = self.windrose_plot_border
-                elif ('CENTER' in self.time_stamp_location) or ('CENTRE' in self.time_stamp_location):
-                    ts_x = self.origin_x-text_w / 2
-                else:
-                    ts_x = self.image_width - self.windrose_plot_border - text_w
+            # plots generated in the same report cycle normally share the
+            # same plot end time and time stamp format so cache the formatted
+            # time stamp
+            _key = (self.plotgen_ts, self.time_stamp)
+            ts_text = self.time_stamp_cache.get(_key)
+            if ts_text is None:
+                ts_text = datetime.datetime.fromtimestamp(self.plotgen_ts).strftime(self.time_stamp).strip()
+                self.time_stamp_cache[_key] = ts_text
+            text_w, text_h = self.text_size(ts_text, self.label_font)
+            ts_top, ts_horiz = self.time_stamp_location
+            if ts_top:
+                ts_y = self.windrose_plot_border + text_h
             else:
                 ts_y = self.image_height - self.windrose_plot_border - text_h
+            if ts_horiz == TS_LEFT:
+                ts_x = self.windrose_plot_border
+            elif ts_horiz == TS_CENTER:
+                ts_x = self.origin_x-text_w / 2
+            else:
                 ts_x = self.image_width - self.windrose_plot_border - text_w
             self.draw.text((ts_x, ts_y),
                            ts_text,
@@ -785,21 +994,25 @@ class StackedWindRoseImageGenerator(weewx.reportengine.ReportGenerator):
         img_file: Full path and filename of plot file
         """
 
-        # the image definitely has to be generated if it doesn't exist
-        if not os.path.exists(img_file):
+        # Get the age of the image, a single stat call tells us whether the
+        # image exists and when it was last modified. The image definitely has
+        # to be generated if it doesn't exist.
+        try:
+            age = time_ts - os.stat(img_file).st_mtime
+        except OSError:
             return False
 
         # if the image is older than 24 hours then regenerate
-        if time_ts - os.stat(img_file).st_mtime >= 86400:
+        if age >= 86400:
             return False
 
         # if time_length > 30 days and the image is less than 24 hours old then
         # skip
-        if time_length > 18144000 and time_ts - os.stat(img_file).st_mtime < 86400:
+        if time_length > 18144000:
             return True
 
         # if time_length > 7 days and the image is less than 1 hour old then skip
-        if time_length >= 604800 and time_ts - os.stat(img_file).st_mtime < 3600:
+        if time_length >= 604800 and age < 3600:
             return True
 
         # otherwise we must regenerate
@@ -828,6 +1041,11 @@ class UniDraw(ImageDraw.ImageDraw):
     the (now) complex error catching
     """
 
+    # whether this version of PIL has the ImageDraw.textsize() method, this
+    # is fixed for the life of the process so it is determined once rather
+    # than discovered through an AttributeError on every call
+    _has_textsize = hasattr(ImageDraw.ImageDraw, 'textsize')
+
     def text(self, position, string, **options):
         """Draw a string using a Unicode or non-Unicode font."""
 
@@ -845,38 +1063,127 @@ class UniDraw(ImageDraw.ImageDraw):
         Unfortunately the ImageDraw.textsize() method was deprecated in PIL
         v9.2 and removed in v10.0. ImageDraw.textbbox() and
         ImageDraw.multiline_textbbox() methods should be used instead. In order
-        to support earlier PIL versions we need to first try the new method and
-        if not found then try the old.
+        to support earlier PIL versions we use textsize() if it exists and
+        multiline_textbbox() if it does not.
         """
 
-        # first try to use textsize(), if we have PIL < 10.0 it will either
-        # work or a UnicodeEncodeError will be raised
-        try:
-            return ImageDraw.ImageDraw.textsize(self, string, **options)
-        except UnicodeEncodeError:
-            # we have PIL < 10.0, but we encountered a UnicodeEncodeError, try
-            # again with utf-8 encoding
-            return ImageDraw.ImageDraw.textsize(self, string.encode('utf-8'), **options)
-        except AttributeError:
-            # there is no textsize() method so this must be PIL 10.0 or later,
-            # try again but this time using the PIL 10.0 equivalents
+        if self._has_textsize:
+            # we have PIL < 10.0, use textsize(), it will either work or a
+            # UnicodeEncodeError will be raised
             try:
-                # first try the textbox bounds
-                left, top, right, bottom = ImageDraw.ImageDraw.multiline_textbbox(self,
-                                                                                  xy=(0, 0),
-                                                                                  text=string,
-                                                                                  **options)
-                # now calculate and return the width and height we require
-                return right - left, bottom - top
+                return ImageDraw.ImageDraw.textsize(self, string, **options)
             except UnicodeEncodeError:
-                # we encountered a UnicodeEncodeError, try the same call again
-                # but with utf-8 encoding
-                left, top, right, bottom = ImageDraw.ImageDraw.multiline_textbbox(self,
-                                                                                  xy=(0, 0),
-                                                                                  text=string.encode('utf-8'),
-                                                                                  **options)
-                # now calculate and return the width and height we require
-                return right - left, bottom - top
+                # we encountered a UnicodeEncodeError, try again with utf-8
+                # encoding
+                return ImageDraw.ImageDraw.textsize(self, string.encode('utf-8'), **options)
+        # there is no textsize() method so this must be PIL 10.0 or later, use
+        # the PIL 10.0 equivalents
+        try:
+            # first try the textbox bounds
+            left, top, right, bottom = ImageDraw.ImageDraw.multiline_textbbox(self,
+                                                                              xy=(0, 0),
+                                                                              text=string,
+                                                                              **options)
+        except UnicodeEncodeError:
+            # we encountered a UnicodeEncodeError, try the same call again
+            # but with utf-8 encoding
+            left, top, right, bottom = ImageDraw.ImageDraw.multiline_textbbox(self,
+                                                                              xy=(0, 0),
+                                                                              text=string.encode('utf-8'),
+                                                                              **options)
+        # now calculate and return the width and height we require
+        return right - left, bottom - top
+
+
+def percent(count, total):
+    """Express a count as a whole number percentage of a total.
+
+    Integer equivalent of int(round(100.0 * count / total, 0)) under python
+    3, halves are rounded to the even percentage.
+
+    Inputs:
+        count: the count, a non-negative integer
+        total: the total, a positive integer
+
+    Returns:
+        the percentage as an integer
+    """
+
+    _pct, _rem = divmod(100 * count, total)
+    if 2 * _rem > total or (2 * _rem == total and _pct & 1):
+        _pct += 1
+    return _pct
+
+
+def bin_wind(speeds, dirs, boundaries):
+    """Bin wind observations by direction and speed range.
+
+    Makes a single pass over the speed and direction observations and counts
+    the number of observations in each of 16 compass directions and 7 speed
+    ranges. The compass direction is calculated arithmetically and the speed
+    range is found by a binary search of the speed range boundaries rather
+    than by a cascade of comparisons.
+
+    Inputs:
+        speeds:     sequence of speed values, may include None
+        dirs:       sequence of direction values, may include None
+        boundaries: ascending sequence of the lower boundaries of speed ranges
+                    1 to 6, boundaries[0] is normally 0
+
+    Returns:
+        a two-way tuple consisting of a 16 x 7 list of lists of counts, where
+        wind_bin[d][s] is the count of obs in direction d ([0] is N, [1] is
+        NNE etc) and speed range s, and the count of obs where the speed or
+        direction was None
+    """
+
+    wind_bin = [[0] * 7 for x in range(16)]
+    none_count = 0
+    # this loop is executed once for every archive record in the plot period,
+    # so bind the functions used to locals to avoid repeated global and
+    # attribute lookups
+    _bisect_left = bisect.bisect_left
+    _inv_sector = INV_SECTOR_WIDTH
+    _boundaries = list(boundaries)
+    for speed, direction in zip(speeds, dirs):
+        if speed is None or direction is None:
+            none_count += 1
+        else:
+            # Map the direction to its compass sector arithmetically. Rotate by
+            # half a sector so N covers 348.75 to 11.25 and wrap into
+            # 0 <= x < 360 before scaling, that way any negative directions
+            # still map to the correct sector. Scale by multiplying by the
+            # reciprocal of the sector width and mask to 0-15 in case
+            # rounding takes a direction just short of 360 to 16. A speed
+            # equal to a boundary belongs to the range below the boundary,
+            # bisect_left gives us exactly that.
+            wind_bin[int(((direction + 11.25) % 360.0) * _inv_sector) & 15][_bisect_left(_boundaries, speed)] += 1
+    return wind_bin, none_count
+
+
+def parse_time_stamp_location(location):
+    """Parse a time_stamp_location option into a placement tuple.
+
+    The time stamp is placed bottom right unless the location includes 'top'
+    and/or one of 'left', 'center' or 'centre'.
+
+    location: the time_stamp_location option value, may be None
+
+    Returns a tuple (top, horizontal) where top is True if the time stamp is
+    to be placed at the top of the plot and horizontal is one of TS_LEFT,
+    TS_CENTER or TS_RIGHT.
+    """
+
+    if not location:
+        return False, TS_RIGHT
+    _location = [x.upper() for x in location]
+    if 'LEFT' in _location:
+        horizontal = TS_LEFT
+    elif 'CENTER' in _location or 'CENTRE' in _location:
+        horizontal = TS_CENTER
+    else:
+        horizontal = TS_RIGHT
+    return 'TOP' in _location, horizontal
 
 
 def parse_color(color, default=None):
@@ -908,7 +1215,27 @@ def parse_color(color, default=None):
     # first up check if we have a string to parse, if we don't return None
     if color is None:
         return None
-    # now try parsing parameter color using getrgb()
+    # the same few colors are parsed every report cycle so results are cached,
+    # color or default may be unhashable (eg a list) in which case the color
+    # is parsed as usual
+    _key = (color, default)
+    try:
+        return _color_cache[_key]
+    except KeyError:
+        _rgb = _parse_color(color, default)
+        _color_cache[_key] = _rgb
+        return _rgb
+    except TypeError:
+        return _parse_color(color, default)
+
+
+def _parse_color(color, default=None):
+    """Parse a color value without caching the result.
+
+    See parse_color() for details.
+    """
+
+    # try parsing parameter color using getrgb()
     try:
         return ImageColor.getrgb(color)
     except ValueError:
@@ -918,7 +1245,7 @@ def parse_color(color, default=None):
             # we have a string that starts with '0x', try to convert it to an
             # int
             try:
-                rgbint = int(color, 0)
+                rgbint = int(color[2:], 16)
             except ValueError:
                 # could not convert to an int, so our string cannot be
                 # converted to a color. Let it pass knowing the final return
@@ -929,8 +1256,8 @@ def parse_color(color, default=None):
                 r = rgbint & 255
                 g = (rgbint >> 8) & 255
                 b = (rgbint >> 16) & 255
-                # parse the RGB components and return the result
-                return parse_color('rgb(%s,%s,%s)' % (r, g, b), default)
+                # the components are already a valid RGB tuple
+                return r, g, b
     except AttributeError:
         # getrgb() could not parse the string, most likely because the string
         # was not a string. Let it pass knowing the final return will attempt
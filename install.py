@@ -13,6 +13,9 @@ Installer for StackedWindRose Image Generator Extension
 Version: 3.1.0                                      Date: 14 March 2024
 
 Revision History
+    unreleased          v3.1.1
+        -   extension installer config is now a plain dict rather than a
+            parsed ConfigObj
     14 March 2024
         -   removed distutils.StrictVersion dependency
         -   now uses weecfg.extension.ExtensionInstaller
@@ -46,67 +49,80 @@ Revision History
 """
 
 # python imports
-import configobj
 from weecfg.extension import ExtensionInstaller
 
-# import StringIO, use six.moves due to python2/python3 differences
-from six.moves import StringIO
-
 # WeeWX imports
 import weewx
 
 # note do not use release candidates, eg 5.0.0rc3
 REQUIRED_WEEWX_VERSION = "3.2.0"
 STACKEDWINDROSE_VERSION = "3.1.0"
-
-# define our config as a multiline string so we can preserve comments
-stacked_config = """
-[StdReport]
-    [[StackedWindRose]]
-        skin = StackedWindRose
-        [[[Units]]]
-            [[[[Groups]]]]
-                group_speed = km_per_hour
-            [[[[Labels]]]]
-                km_per_hour = km/h
-                knot = knots
-                meter_per_second = m/s
-                mile_per_hour = mph
-        [[[Labels]]]
-            compass_points = N, S, E, W
-            [[[[Generic]]]]
-                windGust = Gust Speed
-                windSpeed = Wind Speed
-        [[[StackedWindRoseImageGenerator]]]
-            image_background_image = None
-            image_width = 382
-            image_height = 361
-            image_background_circle_color = 0xF5F5F5
-            image_background_box_color = 0xF5C696
-            image_background_range_ring_color = 0xC3D9DD
-            windrose_plot_border = 5
-            windrose_legend_bar_width = 10
-            windrose_font_path = /usr/share/fonts/truetype/freefont/FreeSansBold.ttf
-            windrose_plot_font_size = 10
-            windrose_plot_font_color = 0x000000
-            windrose_legend_font_size = 10
-            windrose_legend_font_color = 0x000000
-            windrose_label_font_size = 12
-            windrose_label_font_color = 0x000000
-            windrose_plot_petal_colors = aqua, 0xFF9900, 0xFF3300, 0x009900, 0x00CC00, 0x33FF33, 0x00FFCC
-            windrose_plot_petal_width = 16
-            [[[[day_images]]]]
-                time_length = 86400
-                [[[[[daywindrose]]]]]
-                    format = png
-                    [[[[[[windSpeed]]]]]]
-                        label = 24 Hour Wind Rose
-                        time_stamp = %H:%M %-d %b %y
-                        time_stamp_location = bottom, right
-"""
-
-# construct our config dict
-stacked_dict = configobj.ConfigObj(StringIO(stacked_config))
+# extension metadata, available without instantiating the installer
+STACKEDWINDROSE_NAME = "StackedWindRose"
+STACKEDWINDROSE_DESCRIPTION = "Stacked windrose image generator for WeeWX."
+STACKEDWINDROSE_AUTHOR = "Gary Roderick"
+STACKEDWINDROSE_AUTHOR_EMAIL = "gjroderick@gmail.com"
+STACKEDWINDROSE_FILES = [('bin/user', ['bin/user/stackedwindrose.py']),
+                         ('skins/StackedWindRose', ['skins/StackedWindRose/skin.conf'])]
+
+# the extension installer config dict
+stacked_dict = {
+    'StdReport': {
+        'StackedWindRose': {
+            'skin': 'StackedWindRose',
+            'Units': {
+                'Groups': {
+                    'group_speed': 'km_per_hour'
+                },
+                'Labels': {
+                    'km_per_hour': 'km/h',
+                    'knot': 'knots',
+                    'meter_per_second': 'm/s',
+                    'mile_per_hour': 'mph'
+                }
+            },
+            'Labels': {
+                'compass_points': ['N', 'S', 'E', 'W'],
+                'Generic': {
+                    'windGust': 'Gust Speed',
+                    'windSpeed': 'Wind Speed'
+                }
+            },
+            'StackedWindRoseImageGenerator': {
+                'image_background_image': 'None',
+                'image_width': '382',
+                'image_height': '361',
+                'image_background_circle_color': '0xF5F5F5',
+                'image_background_box_color': '0xF5C696',
+                'image_background_range_ring_color': '0xC3D9DD',
+                'windrose_plot_border': '5',
+                'windrose_legend_bar_width': '10',
+                'windrose_font_path': '/usr/share/fonts/truetype/freefont/FreeSansBold.ttf',
+                'windrose_plot_font_size': '10',
+                'windrose_plot_font_color': '0x000000',
+                'windrose_legend_font_size': '10',
+                'windrose_legend_font_color': '0x000000',
+                'windrose_label_font_size': '12',
+                'windrose_label_font_color': '0x000000',
+                'windrose_plot_petal_colors': ['aqua', '0xFF9900', '0xFF3300',
+                                               '0x009900', '0x00CC00',
+                                               '0x33FF33', '0x00FFCC'],
+                'windrose_plot_petal_width': '16',
+                'day_images': {
+                    'time_length': '86400',
+                    'daywindrose': {
+                        'format': 'png',
+                        'windSpeed': {
+                            'label': '24 Hour Wind Rose',
+                            'time_stamp': '%H:%M %-d %b %y',
+                            'time_stamp_location': ['bottom', 'right']
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
 
 def version_compare(v1, v2):
     """Basic 'distutils' and 'packaging' free version comparison.
@@ -119,18 +135,17 @@ def version_compare(v1, v2):
         +1 if v1 is greater than v2
     """
 
-    import itertools
-    mash = itertools.zip_longest(v1.split('.'), v2.split('.'), fillvalue='0')
-    for x1, x2 in mash:
-        try:
-            y1, y2 = int(x1), int(x2)
-        except ValueError:
-            y1, y2 = x1, x2
-        if y1 > y2:
-            return 1
-        if y1 < y2:
-            return -1
-    return 0
+    p1 = v1.split('.')
+    p2 = v2.split('.')
+    # pad the shorter version with zeros so both have the same number of
+    # components
+    p1 += ['0'] * (len(p2) - len(p1))
+    p2 += ['0'] * (len(p1) - len(p2))
+    # compare components as ints if both are numeric otherwise as strings,
+    # then compare the versions in one go as tuples
+    k1, k2 = zip(*[(int(x1), int(x2)) if x1.isdigit() and x2.isdigit() else (x1, x2)
+                   for x1, x2 in zip(p1, p2)])
+    return (k1 > k2) - (k1 < k2)
 
 def loader():
     return StackedWindRoseInstaller()
@@ -138,17 +153,16 @@ def loader():
 class StackedWindRoseInstaller(ExtensionInstaller):
     def __init__(self):
         if version_compare(weewx.__version__, REQUIRED_WEEWX_VERSION) < 0:
-            msg = "%s requires WeeWX %s or greater, found %s" % (' '.join(('StackedWindRose', STACKEDWINDROSE_VERSION)),
+            msg = "%s requires WeeWX %s or greater, found %s" % (' '.join((STACKEDWINDROSE_NAME, STACKEDWINDROSE_VERSION)),
                                                                  REQUIRED_WEEWX_VERSION,
                                                                  weewx.__version__)
             raise weewx.UnsupportedFeature(msg)
         super(StackedWindRoseInstaller, self).__init__(
             version=STACKEDWINDROSE_VERSION,
-            name='StackedWindRose',
-            description='Stacked windrose image generator for WeeWX.',
-            author="Gary Roderick",
-            author_email="gjroderick@gmail.com",
-            files=[('bin/user', ['bin/user/stackedwindrose.py']),
-                   ('skins/StackedWindRose', ['skins/StackedWindRose/skin.conf'])],
+            name=STACKEDWINDROSE_NAME,
+            description=STACKEDWINDROSE_DESCRIPTION,
+            author=STACKEDWINDROSE_AUTHOR,
+            author_email=STACKEDWINDROSE_AUTHOR_EMAIL,
+            files=STACKEDWINDROSE_FILES,
             config=stacked_dict
         )